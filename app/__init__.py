@@ -1,9 +1,55 @@
-from flask import Flask
+from flask import Flask, current_app
+from werkzeug.middleware.proxy_fix import ProxyFix
 import mongoengine as me
+import threading
+import os
 from app.api import api_bp
+from app.utils.jobs import start_job_sweeper
+from app.utils.cache_sync import start_cache_listener
+from app.utils.cache import set_ttl, DEFAULT_FALLBACK_TTL
+from app.utils.rate_limit import validate_config
 
+workers_pid = None
+workers_lock = threading.Lock()
 
-app = Flask(__name__)
 
-me.connect("costs_db")
-app.register_blueprint(api_bp, url_prefix="/api")
+def start_background_workers():
+    """
+    Starts the job sweeper, which resumes unfinished jobs, and the cache listener
+    the first time a process serves a request. Threads do not survive fork, so
+    starting them here instead of at import time makes every gunicorn worker run
+    its own, also with --preload where the app is created in the master process.
+    """
+    global workers_pid
+    with workers_lock:
+        if workers_pid == os.getpid():
+            return
+        workers_pid = os.getpid()
+    start_job_sweeper()
+    start_cache_listener(current_app._get_current_object())
+
+
+def create_app(config=None):
+    app = Flask(__name__)
+    app.config.from_mapping(MONGODB_DB="costs_db", BACKGROUND_WORKERS=True)
+    app.config.from_prefixed_env()
+    if config is not None:
+        app.config.from_mapping(config)
+
+    validate_config(app.config)
+
+    # number of reverse proxies in front of the app whose X-Forwarded-For header
+    # is trusted for the client address
+    if app.config.get("PROXY_FIX_X_FOR"):
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=app.config["PROXY_FIX_X_FOR"])
+
+    # caches only keep the long ttl while the cache listener has an open stream
+    set_ttl(app.config.get("CACHE_FALLBACK_TTL", DEFAULT_FALLBACK_TTL))
+    me.connect(app.config["MONGODB_DB"])
+    app.register_blueprint(api_bp, url_prefix="/api")
+    if app.config["BACKGROUND_WORKERS"]:
+        app.before_request(start_background_workers)
+    return app
+
+
+app = create_app()
@@ -1,9 +1,12 @@
 from app.api import api_bp
 from app.utils.auth import basic_auth, token_auth
+from app.utils.rate_limit import rate_limit
+from app.utils.cache import token_cache
 from flask import jsonify
 
 
 @api_bp.route("/login", methods=["GET"])
+@rate_limit(cost=5, by_ip=True)
 @basic_auth.login_required
 def login():
     """
@@ -15,6 +18,7 @@ def login():
     @apiSuccess {String} token Authorization token
 
     @apiError (Unauthorized 401) Unauthorized The user name or password is incorrect.
+    @apiError (Too Many Requests 429) TooManyRequests Rate limit exceeded, retry after Retry-After seconds.
     """
     token = basic_auth.current_user().get_token()
     data = {"token": token}
@@ -23,6 +27,7 @@ def login():
 
 @api_bp.route("/logout", methods=["GET"])
 @token_auth.login_required
+@rate_limit(cost=1)
 def logout():
     """
     @api {get} /api/logout logout
@@ -34,7 +39,9 @@ def logout():
     logs out the user with given token and revokes the token.
 
     @apiError (Unauthorized 401) Unauthorized the user is not authorized.
+    @apiError (Too Many Requests 429) TooManyRequests Rate limit exceeded, retry after Retry-After seconds.
     """
     user = token_auth.current_user()
     user.revoke_token()
+    token_cache.invalidate(user.user_id)
     return jsonify(status=200)
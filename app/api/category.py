@@ -1,17 +1,22 @@
 from app.api import api_bp
 from app.db.models import Expense, Category
-from flask import jsonify, request
+from flask import jsonify, request, url_for
 import mongoengine as me
 from jsonschema import validate
 from app.utils.json_schemas import CategorySchema
 from jsonschema.exceptions import ValidationError
 import uuid
+from bson import ObjectId
 from app.api.auth import token_auth
 from app.utils.errors import error_response
+from app.utils.jobs import job_handler, submit_job, process_in_chunks
+from app.utils.rate_limit import rate_limit
+from app.utils.cache import category_cache
 
 
 @api_bp.route("/user/categories", methods=["GET"])
 @token_auth.login_required
+@rate_limit(cost=3, expensive=True)
 def get_user_categories():
     """
     @api {get} /api/user/categories Get User categories
@@ -19,23 +24,65 @@ def get_user_categories():
     @apiGroup Category
     @apiHeader {String} authorization Authorization token.
     @apiDescription
-    Returns list of all categories created by user.
-
-    @apiSuccess {object[]} expenses list of all user Categories
-
+    Returns list of all categories created by user. If stats query parameter is
+    true then expense count, total cost and last used date of each category are
+    also returned, all computed with a single aggregation.
+
+    @apiQuery {Boolean} stats Include per-category expense statistics, one of
+    1, true, yes and on.
+
+    @apiSuccess {object[]} categories list of all user Categories
+
+    @apiSuccessExample success-response (stats=true):
+        HTTP/1.1 200 OK
+        {
+            "categories": [
+                {
+                    "name": "transportation",
+                    "category_id": "5b1e0a36-6f36-4c5e-9d57-1d6b3f0c7a1e",
+                    "expense_count": 2,
+                    "total_cost": 46,
+                    "last_used": "2023-11-19T15:43:00"
+                }
+            ]
+        }
     @apiError (Unauthorized 401) Unauthorized the user is not authorized.
+    @apiError (Too Many Requests 429) TooManyRequests Rate limit exceeded, retry after Retry-After seconds.
 
     """
     user = token_auth.current_user()
-    categories = [
-        category.to_dict() for category in Category.objects(user=user).exclude("user")
-    ]
+    include_stats = request.args.get("stats", "").lower() in ("1", "true", "yes", "on")
+    cache_key = (user.user_id, include_stats)
+    categories = category_cache.get(cache_key)
+    if categories is not None:
+        data = {"categories": categories}
+        return jsonify(data), 200
+
+    generation = category_cache.current_generation()
+    user_categories = list(
+        Category.objects(user=user, deleting__ne=True).exclude("user")
+    )
+    if include_stats:
+        empty_stats = {"expense_count": 0, "total_cost": 0, "last_used": None}
+        stats = Expense.category_stats(user)
+        categories = [
+            category.to_dict(stats=stats.get(category.id, empty_stats))
+            for category in user_categories
+        ]
+    else:
+        categories = [category.to_dict() for category in user_categories]
+
+    tags = [user.user_id] + [str(category.id) for category in user_categories]
+    if include_stats:
+        tags.append("stats")
+    category_cache.set(cache_key, categories, tags=tags, generation=generation)
     data = {"categories": categories}
     return jsonify(data), 200
 
 
 @api_bp.route("/user/categories", methods=["POST"])
 @token_auth.login_required
+@rate_limit(cost=1)
 def create_category():
     """
     @api {post} /api/user/categories Create new Category
@@ -52,6 +99,7 @@ def create_category():
 
     @apiError (Unauthorized 401) Unauthorized the user is not authorized.
     @apiError (Bad Request 400) BadRequest Invalid data sent by user.
+    @apiError (Too Many Requests 429) TooManyRequests Rate limit exceeded, retry after Retry-After seconds.
 
     """
     user = token_auth.current_user()
@@ -66,12 +114,14 @@ def create_category():
     category = Category()
     category.from_dict(data)
     category.save()
+    category_cache.invalidate(user.user_id)
     category_data = category.to_dict()
     return jsonify(category_data), 201
 
 
 @api_bp.route("/user/categories/<string:category_id>", methods=["PUT"])
 @token_auth.login_required
+@rate_limit(cost=1)
 def edit_category(category_id):
     """
     @api {put} /api/user/categories/:category_id Modify Category
@@ -89,11 +139,14 @@ def edit_category(category_id):
     @apiError (Unauthorized 401) Unauthorized the user is not authorized.
     @apiError (Bad Request 400) BadRequest Invalid data sent by user.
     @apiError (Not found 404) NotFound Category with given id not found.
+    @apiError (Too Many Requests 429) TooManyRequests Rate limit exceeded, retry after Retry-After seconds.
 
     """
     try:
         user = token_auth.current_user()
-        category = Category.objects.get(user=user, category_id=category_id)
+        category = Category.objects.get(
+            user=user, category_id=category_id, deleting__ne=True
+        )
     except me.DoesNotExist:
         return error_response(404, message="Resource not found")
 
@@ -105,12 +158,14 @@ def edit_category(category_id):
 
     category.from_dict(data)
     category.save()
+    category_cache.invalidate(user.user_id)
     data = category.to_dict()
     return jsonify(data), 200
 
 
 @api_bp.route("/user/categories/<string:category_id>", methods=["DELETE"])
 @token_auth.login_required
+@rate_limit(cost=5)
 def delete_category(category_id):
     """
     @api {delete} /api/user/categories/:category_id Delete Category
@@ -118,18 +173,70 @@ def delete_category(category_id):
     @apiGroup Category
     @apiHeader {String} authorization Authorization token.
     @apiDescription
-    Deletes the category with given id.
-
+    Deletes the category with given id. The category is hidden right away, its
+    expenses are detached from it in a background job and the category itself is
+    removed once the job is done. If the job fails the category is shown again.
+    Progress of the deletion can be polled from the returned job location.
+
+    @apiSuccess (Accepted 202) {String} job_id Job id
+    @apiSuccess (Accepted 202) {String} kind Job kind
+    @apiSuccess (Accepted 202) {String} status Job status
+
+    @apiSuccessExample success-response:
+        HTTP/1.1 202 Accepted
+        Location: /api/jobs/0a4f7c2e-3f59-4b8e-9a44-7e3d2b6f1c90
+        {
+            "job_id": "0a4f7c2e-3f59-4b8e-9a44-7e3d2b6f1c90",
+            "kind": "delete_category",
+            "status": "pending",
+            "processed": 0,
+            "total": null,
+            "error": null,
+            "created_at": "2023-11-19T15:43:00",
+            "updated_at": "2023-11-19T15:43:00"
+        }
     @apiError (Unauthorized 401) Unauthorized the user is not authorized.
     @apiError (Not found 404) NotFound Category with given id not found.
+    @apiError (Too Many Requests 429) TooManyRequests Rate limit exceeded, retry after Retry-After seconds.
 
     """
     try:
         user = token_auth.current_user()
-        category = Category.objects.get(user=user, category_id=category_id)
+        category = Category.objects.get(
+            user=user, category_id=category_id, deleting__ne=True
+        )
     except me.DoesNotExist:
         return error_response(404, message="Resource not found")
 
-    Expense.objects(category=category).update(set__category=None)
-    category.delete()
-    return jsonify(status=200)
+    category.update(set__deleting=True)
+    category_cache.invalidate(user.user_id)
+    params = {"category_id": category.category_id, "category": str(category.id)}
+    job = submit_job(user, "delete_category", params)
+    response = jsonify(job.to_dict())
+    response.status_code = 202
+    response.headers["Location"] = url_for("api.get_job", job_id=job.job_id)
+    return response
+
+
+@job_handler("delete_category")
+def delete_category_job(job):
+    # expenses are looked up by the category pk, so that a job resumed after the
+    # category was removed still detaches the expenses left pointing at it
+    category_pk = ObjectId(job.params["category"])
+
+    def detach_expenses(expense_ids):
+        Expense.objects(id__in=expense_ids).update(set__category=None)
+
+    try:
+        expenses = Expense.objects(category=category_pk)
+        process_in_chunks(job, expenses, detach_expenses)
+        Category.objects(pk=category_pk).delete()
+        # expenses saved with the category between the last chunk and its deletion
+        Expense.objects(category=category_pk).update(set__category=None)
+    except Exception:
+        # show the category again so that the user can retry the deletion
+        Category.objects(pk=category_pk).update(set__deleting=False)
+        raise
+    finally:
+        category_cache.invalidate(str(category_pk))
+        category_cache.invalidate(job.user.user_id)
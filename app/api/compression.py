@@ -0,0 +1,100 @@
+from app.api import api_bp
+from flask import current_app, request
+import zlib
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Defaults favour CPU time over ratio: on repetitive JSON, gzip level 5 and brotli
+# quality 4 reach almost the size of the highest levels for a fraction of the cost.
+DEFAULT_MIN_SIZE = 500
+DEFAULT_GZIP_LEVEL = 5
+DEFAULT_BROTLI_QUALITY = 4
+
+
+def gzip_compressor(level):
+    compressor = zlib.compressobj(level, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+
+    def flush():
+        return compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    return compressor.compress, flush, compressor.flush
+
+
+def brotli_compressor(quality):
+    compressor = brotli.Compressor(quality=quality)
+    return compressor.process, compressor.flush, compressor.finish
+
+
+def get_compressor(encoding):
+    """
+    Returns process, flush and finish functions of a new compressor for encoding.
+    flush emits everything processed so far without ending the stream.
+    """
+    config = current_app.config
+    if encoding == "br":
+        quality = config.get("COMPRESS_BROTLI_QUALITY", DEFAULT_BROTLI_QUALITY)
+        return brotli_compressor(quality)
+    level = config.get("COMPRESS_GZIP_LEVEL", DEFAULT_GZIP_LEVEL)
+    return gzip_compressor(level)
+
+
+def compress(data, encoding):
+    process, _, finish = get_compressor(encoding)
+    return process(data) + finish()
+
+
+def compress_stream(chunks, compressor):
+    # runs while the server sends the body, after the app context is gone, so the
+    # compressor is created beforehand
+    process, flush, finish = compressor
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode("utf-8")
+            # flushing every chunk sends it to the client right away instead of
+            # waiting for the compressor's buffer to fill
+            compressed = process(chunk) + flush()
+            if compressed:
+                yield compressed
+        yield finish()
+    finally:
+        if hasattr(chunks, "close"):
+            chunks.close()
+
+
+def available_encodings():
+    return ["br", "gzip"] if brotli is not None else ["gzip"]
+
+
+@api_bp.after_request
+def compress_response(response):
+    response.vary.add("Accept-Encoding")
+    if (
+        not current_app.config.get("COMPRESS_ENABLED", True)
+        or response.status_code < 200
+        or response.status_code in (204, 206, 304)
+        or "Content-Encoding" in response.headers
+        or response.direct_passthrough
+    ):
+        return response
+
+    encoding = request.accept_encodings.best_match(available_encodings())
+    if encoding is None:
+        return response
+
+    if response.is_streamed:
+        compressor = get_compressor(encoding)
+        response.response = compress_stream(response.response, compressor)
+        response.headers.pop("Content-Length", None)
+    else:
+        data = response.get_data()
+        min_size = current_app.config.get("COMPRESS_MIN_SIZE", DEFAULT_MIN_SIZE)
+        if len(data) < min_size:
+            return response
+        response.set_data(compress(data, encoding))
+
+    response.headers["Content-Encoding"] = encoding
+    return response
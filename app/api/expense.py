@@ -13,10 +13,13 @@ from jsonschema.exceptions import ValidationError
 import uuid
 from app.api.auth import token_auth
 from app.utils.errors import error_response
+from app.utils.rate_limit import rate_limit
+from app.utils.cache import category_cache
 
 
 @api_bp.route("/user/expenses", methods=["GET"])
 @token_auth.login_required
+@rate_limit(cost=5, expensive=True)
 def get_user_expenses():
     """
     @api {get} /api/user/expenses Get User expenses
@@ -51,6 +54,7 @@ def get_user_expenses():
             ]
         }
     @apiError (Unauthorized 401) Unauthorized the user is not authorized.
+    @apiError (Too Many Requests 429) TooManyRequests Rate limit exceeded, retry after Retry-After seconds.
 
     """
     user = token_auth.current_user()
@@ -69,7 +73,9 @@ def get_user_expenses():
         after_date = datetime.fromisoformat(parameters.get("after", type=str))
         query &= Q(date__gt=after_date)
     if "category" in parameters:
-        category = Category.objects(name=parameters["category"]).first()
+        category = Category.objects(
+            user=user, name=parameters["category"], deleting__ne=True
+        ).first()
         if category is None:
             data = {"expenses": []}
             return jsonify(data)
@@ -85,6 +91,7 @@ def get_user_expenses():
 
 @api_bp.route("/user/expenses/<string:expense_id>", methods=["GET"])
 @token_auth.login_required
+@rate_limit(cost=1)
 def get_specific_expense(expense_id):
     """
     @api {get} /api/user/expenses/:expense_id Get User specific expense
@@ -108,6 +115,7 @@ def get_specific_expense(expense_id):
         }
     @apiError (Unauthorized 401) Unauthorized the user is not authorized.
     @apiError (Not found 404) NotFound Expense resource with given id not found.
+    @apiError (Too Many Requests 429) TooManyRequests Rate limit exceeded, retry after Retry-After seconds.
 
     """
     try:
@@ -121,6 +129,7 @@ def get_specific_expense(expense_id):
 
 @api_bp.route("/user/expenses", methods=["POST"])
 @token_auth.login_required
+@rate_limit(cost=1)
 def create_expense():
     """
     @api {post} /api/user/expense Create new Expense
@@ -150,6 +159,7 @@ def create_expense():
         }
     @apiError (Unauthorized 401) Unauthorized the user is not authorized.
     @apiError (Bad Request 400) BadRequest Invalid data sent by user.
+    @apiError (Too Many Requests 429) TooManyRequests Rate limit exceeded, retry after Retry-After seconds.
     """
     user = token_auth.current_user()
     data = request.get_json() or {}
@@ -163,7 +173,9 @@ def create_expense():
     expense = Expense()
 
     if "category" in data:
-        category_object = Category.objects(user=user, name=data["category"]).first()
+        category_object = Category.objects(
+            user=user, name=data["category"], deleting__ne=True
+        ).first()
         if category_object is None:
             category_object = Category()
             category_object.name = data["category"]
@@ -174,12 +186,14 @@ def create_expense():
 
     expense.from_dict(data)
     expense.save()
+    category_cache.invalidate(user.user_id)
     expense_data = expense.to_dict()
     return jsonify(expense_data), 201
 
 
 @api_bp.route("/user/expenses/<string:expense_id>", methods=["PUT"])
 @token_auth.login_required
+@rate_limit(cost=1)
 def edit_expense(expense_id):
     """
     @api {put} /user/expenses/:expense_id Modify user Expense
@@ -202,6 +216,7 @@ def edit_expense(expense_id):
     @apiError (Unauthorized 401) Unauthorized the user is not authorized.
     @apiError (Bad Request 400) BadRequest Invalid data sent by user.
     @apiError (Not found 404) NotFound Expense with given id not found.
+    @apiError (Too Many Requests 429) TooManyRequests Rate limit exceeded, retry after Retry-After seconds.
     """
     try:
         user = token_auth.current_user()
@@ -216,7 +231,9 @@ def edit_expense(expense_id):
         return error_response(400, message="Invalid data")
 
     if "category" in data:
-        category_object = Category.objects(user=user, name=data["category"]).first()
+        category_object = Category.objects(
+            user=user, name=data["category"], deleting__ne=True
+        ).first()
         if category_object is None:
             category_object = Category()
             category_object.name = data["category"]
@@ -228,12 +245,14 @@ def edit_expense(expense_id):
     print(data)
     expense.from_dict(data)
     expense.save()
+    category_cache.invalidate(user.user_id)
     data = expense.to_dict()
     return jsonify(data), 200
 
 
 @api_bp.route("/user/expenses/<string:expense_id>", methods=["DELETE"])
 @token_auth.login_required
+@rate_limit(cost=1)
 def delete_expense(expense_id):
     """
     @api {delete} /user/expenses/:expense_id Delete expense
@@ -243,6 +262,7 @@ def delete_expense(expense_id):
 
     @apiError (Unauthorized 401) Unauthorized the user is not authorized.
     @apiError (Not found 404) NotFound Expense with given id not found.
+    @apiError (Too Many Requests 429) TooManyRequests Rate limit exceeded, retry after Retry-After seconds.
     """
     try:
         user = token_auth.current_user()
@@ -251,4 +271,5 @@ def delete_expense(expense_id):
         return error_response(404, message="Resource not found")
 
     expense.delete()
+    category_cache.invalidate(user.user_id)
     return jsonify(status=200)
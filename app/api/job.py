@@ -0,0 +1,54 @@
+from app.api import api_bp
+from app.db.models import Job
+from flask import jsonify
+import mongoengine as me
+from app.api.auth import token_auth
+from app.utils.errors import error_response
+from app.utils.rate_limit import rate_limit
+
+
+@api_bp.route("/jobs/<string:job_id>", methods=["GET"])
+@token_auth.login_required
+@rate_limit(cost=1)
+def get_job(job_id):
+    """
+    @api {get} /api/jobs/:job_id Get Job status
+    @apiName GetJob
+    @apiGroup Job
+    @apiHeader {String} authorization Authorization token.
+    @apiDescription
+    Returns status and progress of a background job started by user.
+
+    @apiSuccess {String} job_id Job id
+    @apiSuccess {String} kind Job kind
+    @apiSuccess {String} status One of pending, running, done and failed
+    @apiSuccess {Number} processed Number of items processed so far
+    @apiSuccess {Number} total Total number of items to process
+    @apiSuccess {String} error Error message of a failed job
+    @apiSuccess {String} created_at Job creation date in ISOformat
+    @apiSuccess {String} updated_at Last progress date in ISOformat
+
+    @apiSuccessExample success-response:
+        HTTP/1.1 200 OK
+        {
+            "job_id": "0a4f7c2e-3f59-4b8e-9a44-7e3d2b6f1c90",
+            "kind": "delete_category",
+            "status": "running",
+            "processed": 1500,
+            "total": 4200,
+            "error": null,
+            "created_at": "2023-11-19T15:43:00",
+            "updated_at": "2023-11-19T15:43:02"
+        }
+    @apiError (Unauthorized 401) Unauthorized the user is not authorized.
+    @apiError (Not found 404) NotFound Job with given id not found.
+    @apiError (Too Many Requests 429) TooManyRequests Rate limit exceeded, retry after Retry-After seconds.
+
+    """
+    try:
+        user = token_auth.current_user()
+        job = Job.objects.get(user=user, job_id=job_id)
+    except me.DoesNotExist:
+        return error_response(404, message="Resource not found")
+
+    return jsonify(job.to_dict()), 200
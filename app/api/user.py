@@ -8,10 +8,12 @@ from jsonschema.exceptions import ValidationError
 import uuid
 from app.utils.auth import token_auth
 from app.utils.errors import error_response
+from app.utils.rate_limit import rate_limit
 
 
 @api_bp.route("/user", methods=["GET"])
 @token_auth.login_required
+@rate_limit(cost=1)
 def get_user():
     """
     @api {get} /api/user Get User data
@@ -40,12 +42,14 @@ def get_user():
             "user_id" : "e3d23c73-7593-4ca3-80cb-4d06e6029456"
         }
     @apiError (Unauthorized 401) Unauthorized the user is not authorized.
+    @apiError (Too Many Requests 429) TooManyRequests Rate limit exceeded, retry after Retry-After seconds.
     """
     user = token_auth.current_user().to_dict()
     return jsonify(user), 200
 
 
 @api_bp.route("/register", methods=["POST"])
+@rate_limit(cost=5, by_ip=True)
 def create_user():
     """
     @api {post} /api/register Create new User
@@ -79,6 +83,7 @@ def create_user():
 
     @apiError (Bad Request 400) BadRequest Invalid data sent by user.
     @apiError (Conflict 409) Conflict Existing data with same field.
+    @apiError (Too Many Requests 429) TooManyRequests Rate limit exceeded, retry after Retry-After seconds.
     """
     data = request.get_json() or {}
     try:
@@ -1,9 +1,15 @@
 from app.db.models.user import User
 from app.db.models.category import Category
 from app.db.models.expense import Expense
+from app.db.models.job import Job
+from app.db.models.rate_limit import RateLimitBucket
+from app.db.models.change_stream import ChangeStreamState
 
 __all__ = [
     "User",
     "Category",
     "Expense",
+    "Job",
+    "RateLimitBucket",
+    "ChangeStreamState",
 ]
\ No newline at end of file
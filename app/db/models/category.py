@@ -6,11 +6,15 @@ class Category(me.Document):
     name = me.StringField(required=True)
     user = me.ReferenceField(User, required=True, reverse_delete_rule=me.CASCADE)
     category_id = me.StringField(unique=True, required=True)
+    # set while a delete_category job detaches the expenses of the category
+    deleting = me.BooleanField(default=False)
 
-    def to_dict(self, include_user=False):
+    def to_dict(self, include_user=False, stats=None):
         data = {"name": self.name, "category_id": self.category_id}
         if include_user and self.user:
             data["user"] = self.user.to_dict()
+        if stats is not None:
+            data.update(stats)
         return data
 
     def from_dict(self, data):
@@ -0,0 +1,25 @@
+import mongoengine as me
+from datetime import datetime
+
+
+class ChangeStreamState(me.Document):
+    name = me.StringField(primary_key=True)
+    resume_token = me.DictField()
+    updated_at = me.DateTimeField(default=datetime.utcnow)
+
+    @staticmethod
+    def load_resume_token(name):
+        state = ChangeStreamState.objects(name=name).first()
+        return (state.resume_token or None) if (state is not None) else None
+
+    @staticmethod
+    def save_resume_token(name, resume_token):
+        ChangeStreamState.objects(name=name).update_one(
+            upsert=True,
+            set__resume_token=resume_token,
+            set__updated_at=datetime.utcnow(),
+        )
+
+    @staticmethod
+    def drop_resume_token(name):
+        ChangeStreamState.objects(name=name).delete()
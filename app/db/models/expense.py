@@ -12,6 +12,8 @@ class Expense(me.Document):
     category = me.ReferenceField(Category)
     expense_id = me.StringField(unique=True, required=True)
 
+    meta = {"indexes": ["category"]}
+
     def to_dict(self, include_user=True):
         expense_date = self.date.isoformat() if (self.date is not None) else None
         category = self.category.name if (self.category is not None) else None
@@ -32,4 +34,27 @@ class Expense(me.Document):
             setattr(self, "date", expense_date)
         for field in ["cost", "user", "description", "category", "expense_id"]:
             if field in data:
-                setattr(self, field, data[field])
\ No newline at end of file
+                setattr(self, field, data[field])
+
+    @staticmethod
+    def category_stats(user):
+        pipeline = [
+            {"$match": {"category": {"$ne": None}}},
+            {
+                "$group": {
+                    "_id": "$category",
+                    "expense_count": {"$sum": 1},
+                    "total_cost": {"$sum": "$cost"},
+                    "last_used": {"$max": "$date"},
+                }
+            },
+        ]
+        stats = {}
+        for row in Expense.objects(user=user).aggregate(pipeline):
+            last_used = row["last_used"]
+            stats[row["_id"]] = {
+                "expense_count": row["expense_count"],
+                "total_cost": row["total_cost"],
+                "last_used": last_used.isoformat() if (last_used is not None) else None,
+            }
+        return stats
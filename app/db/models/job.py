@@ -0,0 +1,80 @@
+import mongoengine as me
+from mongoengine.queryset.visitor import Q
+from datetime import datetime, timedelta
+from app.db.models import User
+
+
+class Job(me.Document):
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+    job_id = me.StringField(unique=True, required=True)
+    user = me.ReferenceField(User, required=True, reverse_delete_rule=me.CASCADE)
+    kind = me.StringField(required=True)
+    params = me.DictField()
+    status = me.StringField(
+        required=True, default=PENDING, choices=[PENDING, RUNNING, DONE, FAILED]
+    )
+    processed = me.IntField(default=0)
+    total = me.IntField()
+    error = me.StringField()
+    created_at = me.DateTimeField(default=datetime.utcnow)
+    updated_at = me.DateTimeField(default=datetime.utcnow)
+    lease_expiration = me.DateTimeField()
+
+    meta = {"indexes": ["status"]}
+
+    def to_dict(self):
+        data = {
+            "job_id": self.job_id,
+            "kind": self.kind,
+            "status": self.status,
+            "processed": self.processed,
+            "total": self.total,
+            "error": self.error,
+            "created_at": self.created_at.isoformat(),
+            "updated_at": self.updated_at.isoformat(),
+        }
+        return data
+
+    def from_dict(self, data):
+        for field in ["job_id", "user", "kind", "params"]:
+            if field in data:
+                setattr(self, field, data[field])
+
+    @staticmethod
+    def claimable(now):
+        return Q(status=Job.PENDING) | Q(status=Job.RUNNING, lease_expiration__lt=now)
+
+    @staticmethod
+    def claim(job_id, lease_seconds=60):
+        """
+        Atomically marks a pending job, or a running job whose lease has expired
+        (its worker died), as running and returns it. Returns None if the job is
+        owned by another live worker or already finished.
+        """
+        now = datetime.utcnow()
+        return Job.objects(Q(job_id=job_id) & Job.claimable(now)).modify(
+            new=True,
+            set__status=Job.RUNNING,
+            set__lease_expiration=now + timedelta(seconds=lease_seconds),
+            set__updated_at=now,
+        )
+
+    def report_progress(self, processed, total=None, lease_seconds=60):
+        now = datetime.utcnow()
+        self.processed = processed
+        if total is not None:
+            self.total = total
+        self.updated_at = now
+        self.lease_expiration = now + timedelta(seconds=lease_seconds)
+        self.save()
+
+    def finish(self, error=None):
+        self.status = Job.FAILED if error else Job.DONE
+        self.error = error
+        self.updated_at = datetime.utcnow()
+        self.lease_expiration = None
+        self.save()
@@ -0,0 +1,47 @@
+import mongoengine as me
+from pymongo import ReturnDocument
+from datetime import datetime
+
+
+class RateLimitBucket(me.Document):
+    key = me.StringField(primary_key=True)
+    tokens = me.FloatField(required=True)
+    updated_at = me.DateTimeField(required=True)
+    allowed = me.BooleanField()
+
+    meta = {
+        "collection": "rate_limit_bucket",
+        "indexes": [{"fields": ["updated_at"], "expireAfterSeconds": 3600}],
+    }
+
+    @staticmethod
+    def consume(key, cost, capacity, rate):
+        """
+        Refills the bucket for the time passed since its last update and takes
+        cost tokens from it if it holds enough, in one atomic update so that all
+        workers share the same bucket. Returns (allowed, tokens left).
+        """
+        now = datetime.utcnow()
+        elapsed = {
+            "$divide": [{"$subtract": [now, {"$ifNull": ["$updated_at", now]}]}, 1000]
+        }
+        refilled = {
+            "$add": [{"$ifNull": ["$tokens", capacity]}, {"$multiply": [elapsed, rate]}]
+        }
+        consumed = {"$cond": ["$allowed", {"$subtract": ["$tokens", cost]}, "$tokens"]}
+        pipeline = [
+            {"$set": {"tokens": {"$min": [capacity, refilled]}, "updated_at": now}},
+            {"$set": {"allowed": {"$gte": ["$tokens", cost]}}},
+            {"$set": {"tokens": consumed}},
+        ]
+        bucket = RateLimitBucket._get_collection().find_one_and_update(
+            {"_id": key}, pipeline, upsert=True, return_document=ReturnDocument.AFTER
+        )
+        return bucket["allowed"], bucket["tokens"]
+
+    @staticmethod
+    def refund(key, cost, capacity):
+        tokens = {"$min": [capacity, {"$add": ["$tokens", cost]}]}
+        RateLimitBucket._get_collection().update_one(
+            {"_id": key}, [{"$set": {"tokens": tokens}}]
+        )
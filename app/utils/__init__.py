@@ -1,3 +1,7 @@
 from app.utils import json_schemas
 from app.utils import auth
 from app.utils import errors
+from app.utils import jobs
+from app.utils import rate_limit
+from app.utils import cache
+from app.utils import cache_sync
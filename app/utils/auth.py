@@ -3,6 +3,8 @@ from flask_httpauth import HTTPBasicAuth
 from flask_httpauth import HTTPTokenAuth
 from flask import jsonify
 from app.utils.errors import error_response
+from app.utils.cache import token_cache
+from datetime import datetime
 
 basic_auth = HTTPBasicAuth()
 token_auth = HTTPTokenAuth()
@@ -22,7 +24,21 @@ def basic_auth_error(status):
 
 @token_auth.verify_token
 def verify_token(token):
-    return User.check_token(token) if token else None
+    if not token:
+        return None
+    # the raw document is cached and a fresh User built for every request, so
+    # that requests never share, and possibly corrupt, the same instance
+    son = token_cache.get(token)
+    if son is not None:
+        if son["token_expiration"] < datetime.utcnow():
+            return None
+        return User._from_son(son)
+    generation = token_cache.current_generation()
+    user = User.check_token(token)
+    if user is not None:
+        son = user.to_mongo().to_dict()
+        token_cache.set(token, son, tags=[user.user_id], generation=generation)
+    return user
 
 
 @token_auth.error_handler
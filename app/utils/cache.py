@@ -0,0 +1,111 @@
+import threading
+import time
+
+DEFAULT_TTL = 300
+DEFAULT_FALLBACK_TTL = 5
+
+
+class LocalCache:
+    """
+    In-process cache whose entries carry tags, so that all entries depending on
+    a document can be dropped when that document changes. Entries also expire
+    after ttl seconds, which stays short until the cache listener has an open
+    change stream and raises it.
+    """
+
+    max_invalidations = 10000
+
+    def __init__(self, ttl=DEFAULT_FALLBACK_TTL):
+        self.ttl = ttl
+        self.entries = {}
+        self.tags = {}
+        self.generation = 0
+        # tag -> generation of its last invalidation, oldest first
+        self.invalidations = {}
+        # invalidations up to this generation are cleared or forgotten
+        self.forgotten_generation = 0
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at, _ = entry
+            if expires_at < time.monotonic():
+                self._remove(key)
+                return None
+            return value
+
+    def set(self, key, value, tags=(), generation=None):
+        """
+        Stores value under key. If generation, taken with current_generation()
+        before reading value from the database, is given and one of tags has been
+        invalidated since, value may be stale and is not stored.
+        """
+        with self.lock:
+            if generation is not None and self._is_stale(tags, generation):
+                return
+            self._remove(key)
+            self.entries[key] = (value, time.monotonic() + self.ttl, tuple(tags))
+            for tag in tags:
+                self.tags.setdefault(tag, set()).add(key)
+
+    def current_generation(self):
+        return self.generation
+
+    def invalidate(self, tag):
+        with self.lock:
+            self.generation += 1
+            self.invalidations.pop(tag, None)
+            self.invalidations[tag] = self.generation
+            if len(self.invalidations) > self.max_invalidations:
+                self._forget_invalidations()
+            for key in self.tags.pop(tag, set()):
+                self._remove(key)
+
+    def clear(self):
+        with self.lock:
+            self.generation += 1
+            self.forgotten_generation = self.generation
+            self.invalidations.clear()
+            self.entries.clear()
+            self.tags.clear()
+
+    def _is_stale(self, tags, generation):
+        if generation < self.forgotten_generation:
+            return True
+        return any(self.invalidations.get(tag, 0) > generation for tag in tags)
+
+    def _forget_invalidations(self):
+        # drop the oldest half, values read before them can no longer be checked
+        # and are refused by _is_stale
+        for _ in range(len(self.invalidations) // 2):
+            tag = next(iter(self.invalidations))
+            self.forgotten_generation = self.invalidations.pop(tag)
+
+    def _remove(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return
+        for tag in entry[2]:
+            keys = self.tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self.tags[tag]
+
+
+# token -> raw User document, tagged with the user id
+token_cache = LocalCache()
+# (user id, stats) -> category list, tagged with the user id, the ids of the
+# categories and "stats" for lists including expense statistics
+category_cache = LocalCache()
+
+caches = [token_cache, category_cache]
+
+
+def set_ttl(ttl):
+    for cache in caches:
+        cache.ttl = ttl
+        cache.clear()
@@ -0,0 +1,140 @@
+from app.db.models import ChangeStreamState
+from app.utils.cache import (
+    token_cache,
+    category_cache,
+    caches,
+    set_ttl,
+    DEFAULT_TTL,
+    DEFAULT_FALLBACK_TTL,
+)
+from pymongo.errors import OperationFailure, PyMongoError
+import mongoengine as me
+import threading
+import logging
+import socket
+import time
+
+RETRY_INTERVAL = 30
+SAVE_INTERVAL = 5
+# InvalidResumeToken, ChangeStreamFatalError and ChangeStreamHistoryLost
+RESUME_TOKEN_ERRORS = (260, 280, 286)
+WATCHED_COLLECTIONS = ["user", "category", "expense"]
+
+logger = logging.getLogger(__name__)
+
+
+class CacheListener(threading.Thread):
+    """
+    Watches the user, category and expense collections with a change stream and
+    drops the local cache entries depending on each changed document, so that
+    writes made by any worker are seen by all of them.
+
+    Change streams need a replica set (a single node one is enough). When they
+    are unavailable the caches fall back to a short ttl until the stream can be
+    opened again.
+    """
+
+    def __init__(self, name, ttl=DEFAULT_TTL, fallback_ttl=DEFAULT_FALLBACK_TTL):
+        super().__init__(name="cache-listener", daemon=True)
+        self.listener_name = name
+        self.ttl = ttl
+        self.fallback_ttl = fallback_ttl
+        self.resume_token = None
+        self.saved_token = None
+        self.saved_at = 0
+
+    def run(self):
+        token_loaded = False
+        while True:
+            try:
+                if not token_loaded:
+                    name = self.listener_name
+                    self.resume_token = ChangeStreamState.load_resume_token(name)
+                    self.saved_token = self.resume_token
+                    token_loaded = True
+                elif self.resume_token is None and self.saved_token is not None:
+                    # never resume from a dropped token, not even after a restart
+                    ChangeStreamState.drop_resume_token(self.listener_name)
+                    self.saved_token = None
+                self.watch()
+            except OperationFailure as e:
+                if e.code in RESUME_TOKEN_ERRORS:
+                    logger.warning("cannot resume change stream, dropping token: %s", e)
+                    self.resume_token = None
+                else:
+                    logger.warning("change streams unavailable: %s", e)
+            except PyMongoError as e:
+                logger.warning("change stream interrupted: %s", e)
+            except Exception:
+                logger.exception("cache listener failed")
+            # nothing invalidates the caches until the stream is open again
+            set_ttl(self.fallback_ttl)
+            time.sleep(RETRY_INTERVAL)
+
+    def watch(self):
+        pipeline = [{"$match": {"ns.coll": {"$in": WATCHED_COLLECTIONS}}}]
+        stream = me.get_db().watch(
+            pipeline, full_document="updateLookup", resume_after=self.resume_token
+        )
+        with stream:
+            # events missed while the stream was down are unknown, start clean
+            set_ttl(self.ttl)
+            while stream.alive:
+                change = stream.try_next()
+                if change is not None:
+                    self.apply(change)
+                    if change["operationType"] == "invalidate":
+                        # the stream is closed and cannot be resumed after this event
+                        return
+                self.save_resume_token(stream.resume_token)
+
+    def apply(self, change):
+        operation = change["operationType"]
+        if operation == "invalidate":
+            self.resume_token = None
+            for cache in caches:
+                cache.clear()
+            return
+        if operation in ("drop", "rename", "dropDatabase"):
+            for cache in caches:
+                cache.clear()
+            return
+
+        collection = change["ns"]["coll"]
+        document_id = change["documentKey"]["_id"]
+        document = change.get("fullDocument") or {}
+        if collection == "user":
+            token_cache.invalidate(document_id)
+        elif collection == "category":
+            category_cache.invalidate(str(document_id))
+            if "user" in document:
+                category_cache.invalidate(document["user"])
+        elif collection == "expense":
+            if "user" in document:
+                category_cache.invalidate(document["user"])
+            else:
+                # deleted expenses carry no owner, drop every list with stats
+                category_cache.invalidate("stats")
+
+    def save_resume_token(self, resume_token):
+        if resume_token is None:
+            return
+        self.resume_token = resume_token
+        now = time.monotonic()
+        if resume_token == self.saved_token or now - self.saved_at < SAVE_INTERVAL:
+            return
+        ChangeStreamState.save_resume_token(self.listener_name, resume_token)
+        self.saved_token = resume_token
+        self.saved_at = now
+
+
+def start_cache_listener(app):
+    if not app.config.get("CACHE_CHANGE_STREAMS", True):
+        return None
+    listener = CacheListener(
+        name=app.config.get("CACHE_LISTENER_NAME", socket.gethostname()),
+        ttl=app.config.get("CACHE_TTL", DEFAULT_TTL),
+        fallback_ttl=app.config.get("CACHE_FALLBACK_TTL", DEFAULT_FALLBACK_TTL),
+    )
+    listener.start()
+    return listener
@@ -0,0 +1,117 @@
+from app.db.models import Job
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import threading
+import uuid
+import logging
+import time
+
+CHUNK_SIZE = 500
+LEASE_SECONDS = 60
+SWEEP_INTERVAL = LEASE_SECONDS
+
+logger = logging.getLogger(__name__)
+executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="jobs")
+handlers = {}
+queued = set()
+queued_lock = threading.Lock()
+
+
+def job_handler(kind):
+    """
+    Registers a function as the handler of the given job kind. Handlers receive
+    the claimed Job and must be idempotent, processing only what is left to do,
+    so that a job interrupted by a restart can simply be run again.
+    """
+
+    def decorator(func):
+        handlers[kind] = func
+        return func
+
+    return decorator
+
+
+def submit_job(user, kind, params=None):
+    if kind not in handlers:
+        raise ValueError(f"unknown job kind: {kind}")
+    job = Job()
+    job.from_dict(
+        {
+            "job_id": str(uuid.uuid4()),
+            "user": user,
+            "kind": kind,
+            "params": params or {},
+        }
+    )
+    job.save()
+    enqueue(job.job_id)
+    return job
+
+
+def enqueue(job_id):
+    with queued_lock:
+        if job_id in queued:
+            return
+        queued.add(job_id)
+    executor.submit(run_job, job_id)
+
+
+def run_job(job_id):
+    try:
+        job = Job.claim(job_id, lease_seconds=LEASE_SECONDS)
+        if job is None:
+            return
+        try:
+            handlers[job.kind](job)
+        except Exception as e:
+            logger.exception("job %s failed", job_id)
+            job.finish(error=str(e) or type(e).__name__)
+        else:
+            job.finish()
+    finally:
+        with queued_lock:
+            queued.discard(job_id)
+
+
+def resume_jobs():
+    """
+    Queues jobs that are pending, or running with an expired lease because the
+    worker running them died.
+    """
+    for job in Job.objects(Job.claimable(datetime.utcnow())).only("job_id"):
+        enqueue(job.job_id)
+
+
+def sweep_jobs():
+    # a worker respawned right after a crash still finds the dead worker's lease
+    # valid, so jobs are looked for again every SWEEP_INTERVAL
+    while True:
+        try:
+            resume_jobs()
+        except Exception:
+            logger.exception("resuming jobs failed")
+        time.sleep(SWEEP_INTERVAL)
+
+
+def start_job_sweeper():
+    sweeper = threading.Thread(target=sweep_jobs, name="job-sweeper", daemon=True)
+    sweeper.start()
+    return sweeper
+
+
+def process_in_chunks(job, queryset, process_chunk, chunk_size=CHUNK_SIZE):
+    """
+    Calls process_chunk with lists of at most chunk_size primary keys taken from
+    queryset until it is exhausted, reporting progress after every chunk.
+    process_chunk must remove the documents from queryset's result set, otherwise
+    the loop never ends.
+    """
+    processed = job.processed
+    job.report_progress(processed, total=processed + queryset.count())
+    while True:
+        ids = [doc.pk for doc in queryset.only("id").limit(chunk_size)]
+        if not ids:
+            break
+        process_chunk(ids)
+        processed += len(ids)
+        job.report_progress(processed, lease_seconds=LEASE_SECONDS)
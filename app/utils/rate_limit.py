@@ -0,0 +1,172 @@
+from app.db.models import RateLimitBucket
+from app.utils.auth import token_auth
+from app.utils.errors import error_response
+from flask import current_app, request
+from functools import wraps
+from collections import OrderedDict
+import math
+import threading
+import time
+
+DEFAULT_CAPACITY = 60
+DEFAULT_RATE = 1.0
+DEFAULT_MAX_CONCURRENT = 2
+
+# cost of the heaviest rate limited view, checked against RATELIMIT_CAPACITY
+max_cost = 0
+
+
+class MemoryBackend:
+    """
+    Token buckets kept in process memory. Every worker limits on its own, so it
+    fits a single worker deployment or tests.
+    """
+
+    max_keys = 10000
+    low_water_keys = 9000
+
+    def __init__(self):
+        self.buckets = OrderedDict()
+        self.lock = threading.Lock()
+
+    def consume(self, key, cost, capacity, rate):
+        now = time.monotonic()
+        with self.lock:
+            tokens, updated_at = self.buckets.pop(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated_at) * rate)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            self.buckets[key] = (tokens, now)
+            if len(self.buckets) > self.max_keys:
+                self.evict()
+        return allowed, tokens
+
+    def refund(self, key, cost, capacity):
+        with self.lock:
+            if key in self.buckets:
+                tokens, updated_at = self.buckets[key]
+                self.buckets[key] = (min(capacity, tokens + cost), updated_at)
+
+    def evict(self):
+        # buckets are kept in least recently used order, dropping the oldest
+        # down to low_water_keys keeps eviction rare instead of running on every
+        # request once the limit is reached
+        while len(self.buckets) > self.low_water_keys:
+            self.buckets.popitem(last=False)
+
+
+class MongoBackend:
+    """
+    Token buckets stored in MongoDB and shared by all workers.
+    """
+
+    def consume(self, key, cost, capacity, rate):
+        return RateLimitBucket.consume(key, cost, capacity, rate)
+
+    def refund(self, key, cost, capacity):
+        RateLimitBucket.refund(key, cost, capacity)
+
+
+backends = {"memory": MemoryBackend, "mongo": MongoBackend}
+
+
+def get_backend():
+    backend = current_app.extensions.get("rate_limit_backend")
+    if backend is None:
+        backend = current_app.config.get("RATELIMIT_BACKEND", "memory")
+        if isinstance(backend, str):
+            backend = backends[backend]()
+        current_app.extensions["rate_limit_backend"] = backend
+    return backend
+
+
+class ConcurrencyLimiter:
+    def __init__(self):
+        self.running = {}
+        self.lock = threading.Lock()
+
+    def acquire(self, key, limit):
+        with self.lock:
+            if self.running.get(key, 0) >= limit:
+                return False
+            self.running[key] = self.running.get(key, 0) + 1
+            return True
+
+    def release(self, key):
+        with self.lock:
+            self.running[key] -= 1
+            if self.running[key] == 0:
+                del self.running[key]
+
+
+concurrency_limiter = ConcurrencyLimiter()
+
+
+def too_many_requests(retry_after):
+    response = error_response(429, message="Rate limit exceeded")
+    response.headers["Retry-After"] = str(retry_after)
+    return response
+
+
+def validate_config(config):
+    """
+    Raises ValueError if some view could never pass the limits set in config,
+    since Retry-After would then promise a retry that cannot succeed.
+    """
+    capacity = config.get("RATELIMIT_CAPACITY", DEFAULT_CAPACITY)
+    rate = config.get("RATELIMIT_RATE", DEFAULT_RATE)
+    if rate <= 0:
+        raise ValueError("RATELIMIT_RATE must be positive")
+    if capacity < max_cost:
+        raise ValueError(
+            f"RATELIMIT_CAPACITY must be at least {max_cost}, the heaviest route cost"
+        )
+
+
+def rate_limit(cost=1, by_ip=False, expensive=False):
+    """
+    Limits the decorated view with a token bucket per authenticated user, or per
+    client address if by_ip is set. Each request takes cost tokens from the bucket,
+    so heavier routes can be given a higher cost. Views marked expensive are also
+    limited to RATELIMIT_MAX_CONCURRENT running requests per key in this worker.
+
+    Views limited per user must be decorated after token_auth.login_required.
+    """
+    global max_cost
+    max_cost = max(max_cost, cost)
+
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            config = current_app.config
+            if not config.get("RATELIMIT_ENABLED", True):
+                return func(*args, **kwargs)
+
+            if by_ip:
+                key = f"ip:{request.remote_addr}"
+            else:
+                key = f"user:{token_auth.current_user().user_id}"
+
+            capacity = config.get("RATELIMIT_CAPACITY", DEFAULT_CAPACITY)
+            rate = config.get("RATELIMIT_RATE", DEFAULT_RATE)
+            backend = get_backend()
+            allowed, tokens = backend.consume(key, cost, capacity, rate)
+            if not allowed:
+                return too_many_requests(math.ceil((cost - tokens) / rate))
+
+            if not expensive:
+                return func(*args, **kwargs)
+
+            limit = config.get("RATELIMIT_MAX_CONCURRENT", DEFAULT_MAX_CONCURRENT)
+            if not concurrency_limiter.acquire(key, limit):
+                backend.refund(key, cost, capacity)
+                return too_many_requests(1)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                concurrency_limiter.release(key)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,73 @@
+"""
+Measures bytes on wire and CPU time per response of the compression stage for a
+synthetic get_user_expenses payload.
+
+    python benchmarks/compression.py [number_of_expenses]
+"""
+
+import json
+import random
+import sys
+import time
+import uuid
+import zlib
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+CATEGORIES = ["transportation", "food", "rent", "health", "entertainment", "bills"]
+REPEAT = 20
+
+
+def random_date():
+    return f"2023-{random.randint(1, 12):02}-{random.randint(1, 28):02}T12:00:00"
+
+
+def make_payload(count):
+    expenses = [
+        {
+            "expense_id": str(uuid.uuid4()),
+            "cost": random.randint(1, 500),
+            "date": random_date(),
+            "description": random.choice([None, "weekly", "monthly payment"]),
+            "category": random.choice(CATEGORIES),
+        }
+        for _ in range(count)
+    ]
+    return json.dumps({"expenses": expenses}).encode("utf-8")
+
+
+def gzip_compress(data, level):
+    compressor = zlib.compressobj(level, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+    return compressor.compress(data) + compressor.flush()
+
+
+def measure(name, func, data):
+    start = time.process_time()
+    for _ in range(REPEAT):
+        compressed = func(data)
+    cpu_ms = (time.process_time() - start) * 1000 / REPEAT
+    ratio = len(data) / len(compressed)
+    print(f"{name:<12} {len(compressed):>10} {ratio:>7.1f}x {cpu_ms:>10.2f}")
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    data = make_payload(count)
+    print(f"{count} expenses, {len(data)} bytes uncompressed")
+    print(f"{'encoding':<12} {'bytes':>10} {'ratio':>8} {'cpu ms/req':>10}")
+    for level in (1, 5, 6, 9):
+        measure(f"gzip-{level}", lambda d: gzip_compress(d, level), data)
+    if brotli is not None:
+        for quality in (1, 4, 6, 11):
+            measure(
+                f"br-{quality}", lambda d: brotli.compress(d, quality=quality), data
+            )
+    else:
+        print("brotli is not installed, skipping br")
+
+
+if __name__ == "__main__":
+    main()
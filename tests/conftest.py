@@ -0,0 +1,56 @@
+import os
+
+# no job sweeper or cache listener threads in tests
+os.environ.setdefault("FLASK_BACKGROUND_WORKERS", "false")
+
+from app.utils.cache import caches
+import mongoengine as me
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def clean_caches():
+    ttls = [cache.ttl for cache in caches]
+    yield
+    for cache, ttl in zip(caches, ttls):
+        cache.ttl = ttl
+        cache.clear()
+
+
+@pytest.fixture
+def db():
+    mongomock = pytest.importorskip("mongomock")
+    me.disconnect()
+    me.connect("costs_test", mongo_client_class=mongomock.MongoClient)
+    yield
+    me.disconnect()
+
+
+@pytest.fixture
+def client(db):
+    from app import app
+
+    return app.test_client()
+
+
+@pytest.fixture
+def user(db):
+    from app.db.models import User
+    import uuid
+
+    user = User()
+    user.from_dict(
+        {
+            "user_id": str(uuid.uuid4()),
+            "username": "sjobs",
+            "email": "sjobs@example.com",
+            "password": "secret",
+        }
+    )
+    user.save()
+    return user
+
+
+@pytest.fixture
+def auth_headers(user):
+    return {"Authorization": f"Bearer {user.get_token()}"}
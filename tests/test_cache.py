@@ -0,0 +1,46 @@
+from app.utils.cache import LocalCache
+
+
+def test_invalidate_drops_tagged_entries():
+    cache = LocalCache()
+    cache.set("a", 1, tags=["user:1", "category:1"])
+    cache.set("b", 2, tags=["user:2"])
+    cache.invalidate("category:1")
+    assert cache.get("a") is None
+    assert cache.get("b") == 2
+
+
+def test_set_skips_values_read_before_invalidation():
+    cache = LocalCache()
+    generation = cache.current_generation()
+    cache.invalidate("user:1")
+    cache.set("a", 1, tags=["user:1"], generation=generation)
+    assert cache.get("a") is None
+
+
+def test_unrelated_invalidation_does_not_block_set():
+    cache = LocalCache()
+    generation = cache.current_generation()
+    cache.invalidate("user:2")
+    cache.set("a", 1, tags=["user:1"], generation=generation)
+    assert cache.get("a") == 1
+
+
+def test_set_skips_values_read_before_forgotten_invalidations():
+    cache = LocalCache()
+    cache.max_invalidations = 4
+    generation = cache.current_generation()
+    for i in range(5):
+        cache.invalidate(f"user:{i}")
+    cache.set("a", 1, tags=["user:9"], generation=generation)
+    assert cache.get("a") is None
+    cache.set("a", 1, tags=["user:9"], generation=cache.current_generation())
+    assert cache.get("a") == 1
+
+
+def test_clear_blocks_values_read_before():
+    cache = LocalCache()
+    generation = cache.current_generation()
+    cache.clear()
+    cache.set("a", 1, tags=["user:1"], generation=generation)
+    assert cache.get("a") is None
@@ -0,0 +1,236 @@
+from app.utils import cache_sync
+from app.utils.cache import LocalCache
+from bson import ObjectId
+from pymongo.errors import OperationFailure
+import pytest
+
+
+class Stop(BaseException):
+    pass
+
+
+class FakeStream:
+    def __init__(self, changes):
+        self.changes = list(changes)
+        self.resume_token = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    @property
+    def alive(self):
+        return bool(self.changes)
+
+    def try_next(self):
+        change = self.changes.pop(0)
+        self.resume_token = change["_id"]
+        return change
+
+
+class FakeDb:
+    def __init__(self, changes):
+        self.changes = changes
+        self.resume_after = []
+
+    def watch(self, pipeline, full_document=None, resume_after=None):
+        self.resume_after.append(resume_after)
+        return FakeStream(self.changes)
+
+
+@pytest.fixture
+def caches(monkeypatch):
+    token_cache = LocalCache(ttl=300)
+    category_cache = LocalCache(ttl=300)
+    monkeypatch.setattr(cache_sync, "token_cache", token_cache)
+    monkeypatch.setattr(cache_sync, "category_cache", category_cache)
+    monkeypatch.setattr(cache_sync, "caches", [token_cache, category_cache])
+    return token_cache, category_cache
+
+
+@pytest.fixture
+def ttls(monkeypatch):
+    ttls = []
+    monkeypatch.setattr(cache_sync, "set_ttl", ttls.append)
+    return ttls
+
+
+@pytest.fixture
+def saved_tokens(monkeypatch):
+    saved = []
+    monkeypatch.setattr(cache_sync, "SAVE_INTERVAL", 0)
+    monkeypatch.setattr(
+        cache_sync.ChangeStreamState,
+        "save_resume_token",
+        lambda name, token: saved.append(token),
+    )
+    return saved
+
+
+def change(operation, collection, document_id, document=None):
+    data = {
+        "_id": {"_data": str(ObjectId())},
+        "operationType": operation,
+        "ns": {"db": "costs_db", "coll": collection},
+        "documentKey": {"_id": document_id},
+    }
+    if document is not None:
+        data["fullDocument"] = document
+    return data
+
+
+def test_user_change_drops_tokens_of_user(caches):
+    token_cache, _ = caches
+    token_cache.set("token-1", {}, tags=["user-1"])
+    token_cache.set("token-2", {}, tags=["user-2"])
+    listener = cache_sync.CacheListener("test")
+    listener.apply(change("update", "user", "user-1", {"_id": "user-1"}))
+    assert token_cache.get("token-1") is None
+    assert token_cache.get("token-2") == {}
+
+
+def test_category_insert_drops_lists_of_user(caches):
+    _, category_cache = caches
+    category_cache.set(("user-1", False), [], tags=["user-1"])
+    category_cache.set(("user-2", False), [], tags=["user-2"])
+    category_id = ObjectId()
+    listener = cache_sync.CacheListener("test")
+    listener.apply(
+        change(
+            "insert", "category", category_id, {"_id": category_id, "user": "user-1"}
+        )
+    )
+    assert category_cache.get(("user-1", False)) is None
+    assert category_cache.get(("user-2", False)) == []
+
+
+def test_category_delete_drops_lists_containing_it(caches):
+    _, category_cache = caches
+    category_id = ObjectId()
+    category_cache.set(("user-1", False), [], tags=["user-1", str(category_id)])
+    category_cache.set(("user-2", False), [], tags=["user-2", str(ObjectId())])
+    listener = cache_sync.CacheListener("test")
+    listener.apply(change("delete", "category", category_id))
+    assert category_cache.get(("user-1", False)) is None
+    assert category_cache.get(("user-2", False)) == []
+
+
+def test_expense_update_drops_lists_of_user(caches):
+    _, category_cache = caches
+    category_cache.set(("user-1", True), [], tags=["user-1", "stats"])
+    category_cache.set(("user-2", True), [], tags=["user-2", "stats"])
+    expense_id = ObjectId()
+    listener = cache_sync.CacheListener("test")
+    listener.apply(
+        change("update", "expense", expense_id, {"_id": expense_id, "user": "user-1"})
+    )
+    assert category_cache.get(("user-1", True)) is None
+    assert category_cache.get(("user-2", True)) == []
+
+
+def test_expense_delete_drops_lists_with_stats(caches):
+    _, category_cache = caches
+    category_cache.set(("user-1", True), [], tags=["user-1", "stats"])
+    category_cache.set(("user-1", False), [], tags=["user-1"])
+    listener = cache_sync.CacheListener("test")
+    listener.apply(change("delete", "expense", ObjectId()))
+    assert category_cache.get(("user-1", True)) is None
+    assert category_cache.get(("user-1", False)) == []
+
+
+def test_drop_clears_caches(caches):
+    token_cache, category_cache = caches
+    token_cache.set("token-1", {}, tags=["user-1"])
+    category_cache.set(("user-1", False), [], tags=["user-1"])
+    listener = cache_sync.CacheListener("test")
+    listener.apply(change("drop", "category", None))
+    assert token_cache.get("token-1") is None
+    assert category_cache.get(("user-1", False)) is None
+
+
+def test_watch_raises_ttl_and_saves_resume_tokens(
+    caches, ttls, saved_tokens, monkeypatch
+):
+    events = [change("insert", "user", "user-1", {"_id": "user-1"})]
+    monkeypatch.setattr(cache_sync.me, "get_db", lambda: FakeDb(events))
+    listener = cache_sync.CacheListener("test", ttl=300, fallback_ttl=5)
+    listener.watch()
+    assert ttls == [300]
+    assert saved_tokens == [listener.resume_token]
+
+
+def test_watch_does_not_save_invalidate_token(caches, ttls, saved_tokens, monkeypatch):
+    update = change("update", "user", "user-1", {"_id": "user-1"})
+    invalidate = {"_id": {"_data": "invalidate"}, "operationType": "invalidate"}
+    monkeypatch.setattr(cache_sync.me, "get_db", lambda: FakeDb([update, invalidate]))
+    listener = cache_sync.CacheListener("test")
+    listener.watch()
+    assert saved_tokens == [update["_id"]]
+    assert listener.resume_token is None
+
+
+@pytest.mark.parametrize("code", cache_sync.RESUME_TOKEN_ERRORS)
+def test_run_drops_resume_token_on_resume_errors(code, caches, ttls, monkeypatch):
+    calls = []
+    db = FakeDb([])
+
+    def watch(self):
+        db.watch([], resume_after=self.resume_token)
+        if len(db.resume_after) == 1:
+            raise OperationFailure("cannot resume", code=code)
+        raise Stop()
+
+    monkeypatch.setattr(
+        cache_sync.ChangeStreamState,
+        "load_resume_token",
+        lambda name: {"_data": "stale"},
+    )
+    monkeypatch.setattr(
+        cache_sync.ChangeStreamState,
+        "drop_resume_token",
+        lambda name: calls.append("drop"),
+    )
+    monkeypatch.setattr(cache_sync.CacheListener, "watch", watch)
+    monkeypatch.setattr(cache_sync.time, "sleep", lambda seconds: None)
+
+    listener = cache_sync.CacheListener("test", ttl=300, fallback_ttl=5)
+    with pytest.raises(Stop):
+        listener.run()
+
+    assert db.resume_after == [{"_data": "stale"}, None]
+    assert calls == ["drop"]
+    assert ttls == [5]
+
+
+def test_run_falls_back_and_retries_after_errors(caches, ttls, monkeypatch):
+    calls = []
+
+    def load_resume_token(name):
+        calls.append("load")
+        if len(calls) == 1:
+            raise cache_sync.PyMongoError("server unavailable")
+        return None
+
+    def watch(self):
+        calls.append("watch")
+        raise KeyError("operationType")
+
+    def sleep(seconds):
+        calls.append("sleep")
+        if calls.count("sleep") == 2:
+            raise Stop()
+
+    monkeypatch.setattr(
+        cache_sync.ChangeStreamState, "load_resume_token", load_resume_token
+    )
+    monkeypatch.setattr(cache_sync.CacheListener, "watch", watch)
+    monkeypatch.setattr(cache_sync.time, "sleep", sleep)
+
+    listener = cache_sync.CacheListener("test", ttl=300, fallback_ttl=5)
+    with pytest.raises(Stop):
+        listener.run()
+
+    assert calls == ["load", "sleep", "load", "watch", "sleep"]
+    assert ttls == [5, 5]
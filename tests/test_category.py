@@ -0,0 +1,93 @@
+from app.db.models import Category, Expense
+from datetime import datetime
+import uuid
+import pytest
+
+
+def make_category(user, name):
+    category = Category(name=name, user=user, category_id=str(uuid.uuid4()))
+    category.save()
+    return category
+
+
+def make_expense(user, category, cost, date=None):
+    expense = Expense(
+        cost=cost,
+        date=date,
+        user=user,
+        category=category,
+        expense_id=str(uuid.uuid4()),
+    )
+    expense.save()
+    return expense
+
+
+def test_category_stats(user):
+    food = make_category(user, "food")
+    rent = make_category(user, "rent")
+    make_expense(user, food, 10, datetime(2023, 11, 1))
+    make_expense(user, food, 15, datetime(2023, 11, 19, 15, 43))
+    make_expense(user, rent, 500)
+    make_expense(user, None, 7)
+
+    stats = Expense.category_stats(user)
+    assert stats == {
+        food.id: {
+            "expense_count": 2,
+            "total_cost": 25,
+            "last_used": "2023-11-19T15:43:00",
+        },
+        rent.id: {"expense_count": 1, "total_cost": 500, "last_used": None},
+    }
+
+
+def test_get_categories_without_stats(client, user, auth_headers):
+    food = make_category(user, "food")
+    make_expense(user, food, 10)
+    response = client.get("/api/user/categories", headers=auth_headers)
+    assert response.get_json() == {
+        "categories": [{"name": "food", "category_id": food.category_id}]
+    }
+
+
+@pytest.mark.parametrize("value", ["1", "true", "True", "yes", "on"])
+def test_get_categories_with_stats(client, user, auth_headers, value):
+    food = make_category(user, "food")
+    unused = make_category(user, "unused")
+    make_expense(user, food, 10, datetime(2023, 11, 1))
+    make_expense(user, food, 15, datetime(2023, 11, 19))
+
+    response = client.get(f"/api/user/categories?stats={value}", headers=auth_headers)
+    categories = {c["category_id"]: c for c in response.get_json()["categories"]}
+    assert categories[food.category_id] == {
+        "name": "food",
+        "category_id": food.category_id,
+        "expense_count": 2,
+        "total_cost": 25,
+        "last_used": "2023-11-19T00:00:00",
+    }
+    assert categories[unused.category_id] == {
+        "name": "unused",
+        "category_id": unused.category_id,
+        "expense_count": 0,
+        "total_cost": 0,
+        "last_used": None,
+    }
+
+
+def test_get_categories_with_stats_ignores_other_users(client, user, auth_headers):
+    from app.db.models import User
+
+    other = User(
+        user_id=str(uuid.uuid4()),
+        username="other",
+        email="other@example.com",
+        password_hash="x",
+    )
+    other.save()
+    food = make_category(user, "food")
+    make_expense(other, food, 99)
+
+    response = client.get("/api/user/categories?stats=1", headers=auth_headers)
+    category = response.get_json()["categories"][0]
+    assert category["expense_count"] == 0
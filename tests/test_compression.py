@@ -0,0 +1,85 @@
+from flask import Blueprint, Flask
+from app.api.compression import compress_response, compress_stream, gzip_compressor
+import gzip
+import zlib
+import json
+import pytest
+
+
+@pytest.fixture
+def client():
+    bp = Blueprint("compression_test", __name__)
+    bp.after_request(compress_response)
+    payload = json.dumps({"expenses": [{"category": "food", "cost": 1}] * 200})
+
+    @bp.route("/large")
+    def large():
+        return payload
+
+    @bp.route("/small")
+    def small():
+        return "{}"
+
+    @bp.route("/stream")
+    def stream():
+        def generate():
+            for _ in range(100):
+                yield '{"category": "food", "cost": 1}\n'
+
+        return generate()
+
+    app = Flask(__name__)
+    app.register_blueprint(bp)
+    return app.test_client()
+
+
+def test_compresses_large_response(client):
+    response = client.get("/large", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["Vary"]
+    data = json.loads(gzip.decompress(response.data))
+    assert len(data["expenses"]) == 200
+
+
+def test_skips_small_response(client):
+    response = client.get("/small", headers={"Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in response.headers
+    assert response.data == b"{}"
+
+
+def test_skips_when_not_accepted(client):
+    response = client.get("/large", headers={"Accept-Encoding": "identity"})
+    assert "Content-Encoding" not in response.headers
+
+
+def test_compresses_streamed_response(client):
+    response = client.get(
+        "/stream", headers={"Accept-Encoding": "gzip"}, buffered=False
+    )
+    assert response.headers["Content-Encoding"] == "gzip"
+    body = b"".join(response.response)
+    assert gzip.decompress(body) == b'{"category": "food", "cost": 1}\n' * 100
+
+
+def test_streamed_chunks_are_flushed():
+    chunks = [b'{"category": "food"}\n', b'{"category": "rent"}\n']
+    stream = compress_stream(iter(chunks), gzip_compressor(5))
+    decompressor = zlib.decompressobj(zlib.MAX_WBITS | 16)
+    assert decompressor.decompress(next(stream)) == chunks[0]
+    assert decompressor.decompress(next(stream)) == chunks[1]
+
+
+def test_streamed_body_is_closed():
+    closed = []
+
+    def generate():
+        try:
+            yield b"first"
+            yield b"second"
+        finally:
+            closed.append(True)
+
+    stream = compress_stream(generate(), gzip_compressor(5))
+    next(stream)
+    stream.close()
+    assert closed == [True]
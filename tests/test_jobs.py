@@ -0,0 +1,196 @@
+from app.db.models import Category, Expense, Job
+from app.utils import jobs
+from datetime import datetime, timedelta
+import uuid
+import pytest
+
+
+def make_job(user, kind="test", **fields):
+    job = Job(job_id=str(uuid.uuid4()), user=user, kind=kind, **fields)
+    job.save()
+    return job
+
+
+def make_category(user, name="food"):
+    category = Category(name=name, user=user, category_id=str(uuid.uuid4()))
+    category.save()
+    return category
+
+
+def make_expenses(user, category, count):
+    for _ in range(count):
+        Expense(
+            cost=10, user=user, category=category, expense_id=str(uuid.uuid4())
+        ).save()
+
+
+def test_claim_pending_job(user):
+    job = make_job(user)
+    claimed = Job.claim(job.job_id)
+    assert claimed.status == Job.RUNNING
+    assert claimed.lease_expiration > datetime.utcnow()
+    assert Job.claim(job.job_id) is None
+
+
+def test_claim_running_job_after_lease_expiry(user):
+    lease = datetime.utcnow() + timedelta(seconds=30)
+    job = make_job(user, status=Job.RUNNING, lease_expiration=lease)
+    assert Job.claim(job.job_id) is None
+
+    Job.objects(job_id=job.job_id).update(
+        set__lease_expiration=datetime.utcnow() - timedelta(seconds=1)
+    )
+    assert Job.claim(job.job_id).status == Job.RUNNING
+
+
+def test_claim_finished_job(user):
+    job = make_job(user, status=Job.DONE)
+    assert Job.claim(job.job_id) is None
+
+
+def test_run_job_success(user, monkeypatch):
+    ran = []
+    monkeypatch.setitem(jobs.handlers, "test", lambda job: ran.append(job.job_id))
+    job = make_job(user)
+    jobs.run_job(job.job_id)
+    job.reload()
+    assert ran == [job.job_id]
+    assert job.status == Job.DONE
+    assert job.lease_expiration is None
+
+
+def test_run_job_failure(user, monkeypatch):
+    def fail(job):
+        raise RuntimeError("boom")
+
+    monkeypatch.setitem(jobs.handlers, "test", fail)
+    job = make_job(user)
+    jobs.run_job(job.job_id)
+    job.reload()
+    assert job.status == Job.FAILED
+    assert job.error == "boom"
+    assert job.job_id not in jobs.queued
+
+
+def test_resume_jobs_queues_claimable_jobs(user, monkeypatch):
+    queued = []
+    monkeypatch.setattr(jobs, "enqueue", queued.append)
+    expired = datetime.utcnow() - timedelta(seconds=1)
+    leased = datetime.utcnow() + timedelta(seconds=30)
+    pending = make_job(user)
+    orphaned = make_job(user, status=Job.RUNNING, lease_expiration=expired)
+    make_job(user, status=Job.RUNNING, lease_expiration=leased)
+    make_job(user, status=Job.DONE)
+    jobs.resume_jobs()
+    assert sorted(queued) == sorted([pending.job_id, orphaned.job_id])
+
+
+def detach(expense_ids):
+    Expense.objects(id__in=expense_ids).update(set__category=None)
+
+
+def test_process_in_chunks_reports_progress(user):
+    category = make_category(user)
+    make_expenses(user, category, 5)
+    job = make_job(user)
+    jobs.process_in_chunks(job, Expense.objects(category=category), detach, 2)
+    job.reload()
+    assert job.processed == 5
+    assert job.total == 5
+    assert Expense.objects(category=category).count() == 0
+
+
+def test_process_in_chunks_resumes(user):
+    category = make_category(user)
+    make_expenses(user, category, 3)
+    # two expenses were detached before the worker running the job died
+    job = make_job(user, processed=2, total=5)
+    jobs.process_in_chunks(job, Expense.objects(category=category), detach, 2)
+    job.reload()
+    assert job.processed == 5
+    assert job.total == 5
+
+
+@pytest.fixture
+def queued(monkeypatch):
+    queued = []
+    monkeypatch.setattr(jobs, "enqueue", queued.append)
+    return queued
+
+
+def test_delete_category(client, user, auth_headers, queued):
+    category = make_category(user)
+    make_expenses(user, category, 3)
+
+    response = client.delete(
+        f"/api/user/categories/{category.category_id}", headers=auth_headers
+    )
+    assert response.status_code == 202
+    job_id = response.get_json()["job_id"]
+    assert response.headers["Location"] == f"/api/jobs/{job_id}"
+    assert queued == [job_id]
+
+    response = client.get("/api/user/categories", headers=auth_headers)
+    assert response.get_json() == {"categories": []}
+
+    response = client.get(f"/api/jobs/{job_id}", headers=auth_headers)
+    assert response.status_code == 200
+    assert response.get_json()["status"] == Job.PENDING
+
+    jobs.run_job(job_id)
+    response = client.get(f"/api/jobs/{job_id}", headers=auth_headers)
+    assert response.get_json()["status"] == Job.DONE
+    assert response.get_json()["processed"] == 3
+    assert Category.objects(pk=category.pk).first() is None
+    assert Expense.objects(user=user, category=None).count() == 3
+
+
+def test_delete_category_resumed_after_category_removed(
+    client, user, auth_headers, queued
+):
+    category = make_category(user)
+    make_expenses(user, category, 2)
+    response = client.delete(
+        f"/api/user/categories/{category.category_id}", headers=auth_headers
+    )
+    job_id = response.get_json()["job_id"]
+    # the worker died right after removing the category
+    category.delete()
+
+    jobs.run_job(job_id)
+    assert Job.objects.get(job_id=job_id).status == Job.DONE
+    assert Expense.objects(category=category.pk).count() == 0
+
+
+def test_delete_category_failure_shows_category_again(
+    client, user, auth_headers, queued, monkeypatch
+):
+    def fail(*args):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr("app.api.category.process_in_chunks", fail)
+    category = make_category(user)
+    response = client.delete(
+        f"/api/user/categories/{category.category_id}", headers=auth_headers
+    )
+    jobs.run_job(response.get_json()["job_id"])
+
+    response = client.get("/api/user/categories", headers=auth_headers)
+    assert [c["category_id"] for c in response.get_json()["categories"]] == [
+        category.category_id
+    ]
+
+
+def test_get_job_of_other_user(client, auth_headers):
+    from app.db.models import User
+
+    other = User(
+        user_id=str(uuid.uuid4()),
+        username="other",
+        email="other@example.com",
+        password_hash="x",
+    )
+    other.save()
+    job = make_job(other)
+    response = client.get(f"/api/jobs/{job.job_id}", headers=auth_headers)
+    assert response.status_code == 404
@@ -0,0 +1,104 @@
+from app.utils.rate_limit import (
+    MemoryBackend,
+    DEFAULT_MAX_CONCURRENT,
+    concurrency_limiter,
+    rate_limit,
+    validate_config,
+)
+from flask import Flask
+from werkzeug.middleware.proxy_fix import ProxyFix
+import pytest
+
+
+def test_consume_until_empty():
+    backend = MemoryBackend()
+    assert backend.consume("user:a", 5, capacity=10, rate=0.001)[0]
+    assert backend.consume("user:a", 5, capacity=10, rate=0.001)[0]
+    allowed, tokens = backend.consume("user:a", 5, capacity=10, rate=0.001)
+    assert not allowed
+    assert tokens < 5
+
+
+def test_refund_restores_tokens():
+    backend = MemoryBackend()
+    backend.consume("user:a", 10, capacity=10, rate=0.001)
+    backend.refund("user:a", 10, capacity=10)
+    assert backend.consume("user:a", 10, capacity=10, rate=0.001)[0]
+
+
+def test_evicts_least_recently_used_buckets():
+    backend = MemoryBackend()
+    backend.max_keys = 10
+    backend.low_water_keys = 5
+    for i in range(10):
+        backend.consume(f"user:{i}", 1, capacity=10, rate=1)
+    backend.consume("user:0", 1, capacity=10, rate=1)
+    backend.consume("user:10", 1, capacity=10, rate=1)
+    assert len(backend.buckets) == 5
+    assert "user:0" in backend.buckets
+    assert "user:1" not in backend.buckets
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.config.update(RATELIMIT_CAPACITY=10, RATELIMIT_RATE=1)
+
+    @app.route("/login")
+    @rate_limit(cost=5, by_ip=True)
+    def login():
+        return "ok"
+
+    @app.route("/expenses")
+    @rate_limit(cost=5, by_ip=True, expensive=True)
+    def expenses():
+        return "ok"
+
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=1)
+    return app
+
+
+def get(client, path, address="1.2.3.4"):
+    return client.get(path, headers={"X-Forwarded-For": address})
+
+
+def test_rejects_with_retry_after(app):
+    client = app.test_client()
+    assert get(client, "/login").status_code == 200
+    assert get(client, "/login").status_code == 200
+    response = get(client, "/login")
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "5"
+
+
+def test_limits_forwarded_client_addresses_separately(app):
+    client = app.test_client()
+    for _ in range(2):
+        get(client, "/login", "1.2.3.4")
+    assert get(client, "/login", "1.2.3.4").status_code == 429
+    assert get(client, "/login", "5.6.7.8").status_code == 200
+
+
+def test_refunds_requests_rejected_by_concurrency_cap(app):
+    client = app.test_client()
+    key = "ip:1.2.3.4"
+    for _ in range(DEFAULT_MAX_CONCURRENT):
+        concurrency_limiter.acquire(key, DEFAULT_MAX_CONCURRENT)
+    try:
+        response = get(client, "/expenses")
+        assert response.status_code == 429
+        assert response.headers["Retry-After"] == "1"
+    finally:
+        for _ in range(DEFAULT_MAX_CONCURRENT):
+            concurrency_limiter.release(key)
+    assert get(client, "/expenses").status_code == 200
+    assert get(client, "/expenses").status_code == 200
+
+
+def test_validate_config():
+    rate_limit(cost=5)
+    validate_config({"RATELIMIT_CAPACITY": 5, "RATELIMIT_RATE": 0.5})
+    with pytest.raises(ValueError):
+        validate_config({"RATELIMIT_CAPACITY": 4, "RATELIMIT_RATE": 1})
+    with pytest.raises(ValueError):
+        validate_config({"RATELIMIT_CAPACITY": 60, "RATELIMIT_RATE": 0})